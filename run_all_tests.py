@@ -5,28 +5,33 @@ Comprehensive Test Runner for Signal Parser
 Runs all tests and provides a final summary
 """
 
-import subprocess
+import io
 import sys
-import os
+import traceback
+from contextlib import redirect_stdout
+from functools import partial
 
-def run_test(test_name, command):
-    """Run a test and return the result"""
+import signal_parser
+import test_edge_cases
+import test_real_scenarios
+from testing_utils import run_tests
+
+def run_test(test_name, test_func):
+    """Run a test entry point in-process and return the result"""
     print(f"\n{'='*60}")
     print(f"Running {test_name}")
     print(f"{'='*60}")
     
+    buf = io.StringIO()
     try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
-            print("✅ Test completed successfully")
-            return True
-        else:
-            print("❌ Test failed")
-            print("STDOUT:", result.stdout)
-            print("STDERR:", result.stderr)
-            return False
-    except Exception as e:
-        print(f"❌ Test execution error: {e}")
+        with redirect_stdout(buf):
+            test_func()
+        print("✅ Test completed successfully")
+        return True
+    except Exception:
+        print("❌ Test failed")
+        print("STDOUT:", buf.getvalue())
+        print("STDERR:", traceback.format_exc())
         return False
 
 def main():
@@ -35,14 +40,14 @@ def main():
     print("=" * 60)
     
     tests = [
-        ("Basic Parser Test", "python3 signal_parser.py"),
-        ("Edge Case Testing", "python3 test_edge_cases.py"),
-        ("Real Scenarios Test", "python3 test_real_scenarios.py")
+        ("Basic Parser Test", signal_parser.main),
+        ("Edge Case Testing", partial(run_tests, test_edge_cases)),
+        ("Real Scenarios Test", partial(run_tests, test_real_scenarios))
     ]
     
     results = []
-    for test_name, command in tests:
-        success = run_test(test_name, command)
+    for test_name, test_func in tests:
+        success = run_test(test_name, test_func)
         results.append((test_name, success))
     
     # Print summary
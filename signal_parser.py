@@ -6,166 +6,323 @@ Handles various signal formats including market/now entries and percentage stops
 """
 
 import re
-import os
-from typing import Dict, List, Optional, Tuple
+import sys
+import hashlib
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 
-@dataclass
+# Compiled once at import time and shared by every parser instance.
+# The header is uppercased before matching, so it is matched case-sensitively;
+# the symbol must be whole slash-separated segments (BASE/QUOTE, or more such
+# as BTC/USDT/PERP), none of them empty
+_HEADER_RE = re.compile(r'(?<![A-Z0-9/])([A-Z0-9]+(?:/[A-Z0-9]+)+)\s+(LONG|SHORT)')
+
+# The canonical four-line layout that most signals use, e.g.
+#   BTC/USDT LONG / Entry: 45000 / Target: 48000 / Stop: 3%
+# Blocks matching it exactly skip the general line-by-line parse
+_CANONICAL_RE = re.compile(
+    r'([A-Z0-9]+(?:/[A-Z0-9]+)+) (LONG|SHORT)\n'
+    r'Entry: ([^\s:]+)\n'
+    r'Target: ([^\s:]+)\n'
+    r'Stop: ([^\s:]+)'
+)
+
+# Matches a whole field line in one pass: the leading keyword, then the value
+# between the first and second colon. A keyword is matched as a prefix, so
+# 'Stops', 'Targeted' and 'EntryPrice' lines all count. The keywords are
+# ASCII-only so case folding can't match e.g. U+017F as 's'
+_FIELD_RE = re.compile(
+    r'^[^\S\n]*'
+    r'(?a:(?P<key>entry|target|stop))'
+    r'[^:\n]*(?P<sep>:?)(?P<val>[^:\n]*)',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Separates signal blocks: an explicit boundary marker or a run of blank lines
+# (either line-ending style)
+_BLOCK_SPLIT_RE = re.compile(r'%%--SIGNAL_BOUNDARY--%%|(?:\r?\n){2,}')
+
+# Entry values that mean "enter at the current price"
+_NON_NUMERIC_ENTRIES = frozenset({'market', 'now'})
+
+# When workers are requested, files with at least this many blocks are
+# parsed across worker processes; below it the pool start-up and IPC cost
+# more than they save
+PARALLEL_BLOCK_THRESHOLD = 5000
+_PARALLEL_CHUNKSIZE = 64
+
+@dataclass(slots=True, frozen=True)
 class Signal:
     """Represents a parsed trading signal"""
     symbol: str
     direction: str  # LONG or SHORT
     entry: str     # Can be number, 'market', or 'now'
-    targets: List[float]
+    targets: Tuple[float, ...]
     stop: float
     entry_numeric: Optional[float] = None
     stop_percentage: Optional[float] = None
-    original_text: str = ""
+    original_text_hash: str = ""  # See signal_text_hash and get_original_text
 
-class SignalParser:
-    """Parser for trading signals from text files"""
+def signal_text_hash(text: str) -> str:
+    """Return the short digest stored on a Signal in place of its source text"""
+    return hashlib.blake2b(text.strip().encode('utf-8'), digest_size=8).hexdigest()
 
-    def __init__(self, default_stop_percentage: float = 3.0):
-        self.default_stop_percentage = default_stop_percentage
+def _split_blocks(content: str) -> List[str]:
+    """Split text content into its non-empty signal blocks"""
+    return [block for block in _BLOCK_SPLIT_RE.split(content) if block.strip()]
 
-    def parse_signal_text(self, text: str) -> Optional[Signal]:
-        """Parse a single signal from text"""
-        try:
-            lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
-            if len(lines) < 3:  # Must have at least symbol, entry, and one target
-                return None
+def _read_blocks(filename: str) -> List[str]:
+    """Read the non-empty signal blocks of a file"""
+    # Text mode turns CRLF line endings into '\n', so a file's blocks come
+    # out exactly as parse_stream sees them from the same file opened as text
+    with open(filename, encoding='utf-8') as f:
+        return _split_blocks(f.read())
 
-            # First line should contain symbol and direction
-            first_line = lines[0]
-            # More robust regex to allow for variations in spacing and text
-            symbol_match = re.search(r'([A-Z0-9/]+)\s+(LONG|SHORT)', first_line, re.IGNORECASE)
-            if not symbol_match:
+@lru_cache(maxsize=4096)
+def _parse_cached(text: str, default_stop_percentage: float) -> Optional[Signal]:
+    """Parse stripped signal text; memoized, so the Signal returned is shared"""
+    try:
+        # Fast path: the canonical layout is read with a single match
+        canonical = _CANONICAL_RE.fullmatch(text)
+        if canonical:
+            symbol, direction, entry, target_str, stop_str = canonical.groups()
+            try:
+                targets = [float(target_str)]
+            except ValueError:
                 return None
+            return _build_signal(symbol, direction, entry, targets, stop_str,
+                                 default_stop_percentage, text)
 
-            symbol = symbol_match.group(1).upper()
-            direction = symbol_match.group(2).upper()
-
-            entry = None
-            targets = []
-            stop_str = None
-
-            for line in lines[1:]:
-                line_lower = line.lower()
-                if line_lower.startswith('entry'):
-                    entry = line.split(':')[1].strip()
-                elif line_lower.startswith('target'):
-                    target_str = line.split(':')[1].strip()
-                    try:
-                        targets.append(float(target_str))
-                    except ValueError:
-                        # Ignore invalid target lines
-                        pass
-                elif line_lower.startswith('stop'):
-                    stop_str = line.split(':')[1].strip()
-            
-            if not entry or not targets:
-                # Not a valid signal if it's missing entry or at least one target
-                return None
+        # First line should contain symbol and direction; uppercase it once
+        # so the matched groups come out already canonical
+        first_line, _, _ = text.partition('\n')
+        header = first_line.upper()
+        # A header naming neither direction can't match; reject it with two
+        # substring scans instead of a failing regex search
+        if 'LONG' not in header and 'SHORT' not in header:
+            return None
+        # More robust regex to allow for variations in spacing and text
+        symbol_match = _HEADER_RE.search(header)
+        if not symbol_match:
+            return None
 
-            # Handle missing stop loss
-            if stop_str:
-                stop = self._parse_stop(stop_str)
-                if stop is None: # Invalid stop format
-                    return None
-            else:
-                # Default to 3% if stop is missing
-                stop = -self.default_stop_percentage
-
-            # Create signal object
-            signal = Signal(
-                symbol=symbol,
-                direction=direction,
-                entry=entry,
-                targets=sorted(targets), # Sort targets for consistency
-                stop=stop,
-                original_text=text
-            )
-
-            # Set additional fields
-            if entry.lower() in ['market', 'now']:
-                signal.entry_numeric = None
-            else:
+        symbol, direction = symbol_match.groups()
+
+        entry = None
+        targets = []
+        stop_str = None
+
+        # One finditer over the lines after the header picks out every field
+        # line; requiring an entry and a target below also guarantees the
+        # minimum of three lines (symbol, entry and one target)
+        for field_match in _FIELD_RE.finditer(text, len(first_line) + 1):
+            if not field_match['sep']:
+                # A field line without a value is not a valid signal
+                return None
+            field = field_match['key'].lower()
+            value = field_match['val'].strip()
+            if field == 'entry':
+                entry = value
+            elif field == 'target':
                 try:
-                    signal.entry_numeric = float(entry)
+                    targets.append(float(value))
                 except ValueError:
-                    # If entry is not a valid number, treat as a non-parsable signal
-                    return None
+                    # Ignore invalid target lines
+                    pass
+            else:
+                stop_str = value
 
-            # Set stop percentage if it's a percentage stop
-            if signal.stop < 0:
-                signal.stop_percentage = abs(signal.stop)
+        return _build_signal(symbol, direction, entry, targets, stop_str,
+                             default_stop_percentage, text)
 
-            return signal
+    except Exception as e:
+        # Suppress printing errors for non-signal blocks
+        # print(f"Info: Skipping block, could not parse as signal. Text: '{text}'")
+        return None
 
-        except Exception as e:
-            # Suppress printing errors for non-signal blocks
-            # print(f"Info: Skipping block, could not parse as signal. Text: '{text}'")
+def _build_signal(symbol: str, direction: str, entry: Optional[str], targets: List[float],
+                  stop_str: Optional[str], default_stop_percentage: float,
+                  text: str) -> Optional[Signal]:
+    """Validate the extracted fields and build the Signal"""
+    if not entry or not targets:
+        # Not a valid signal if it's missing entry or at least one target
+        return None
+
+    # Handle missing stop loss
+    if stop_str:
+        stop = _parse_stop(stop_str)
+        if stop is None: # Invalid stop format
+            return None
+    else:
+        # Default to 3% if stop is missing
+        stop = -default_stop_percentage
+
+    # Sort targets for consistency; the list is ours, so sort in place
+    targets.sort()
+
+    # Work out the derived fields before building the signal
+    if entry.lower() in _NON_NUMERIC_ENTRIES:
+        entry_numeric = None
+    else:
+        try:
+            entry_numeric = float(entry)
+        except ValueError:
+            # If entry is not a valid number, treat as a non-parsable signal
             return None
+
+    # Set stop percentage if it's a percentage stop
+    stop_percentage = abs(stop) if stop < 0 else None
+
+    # Create signal object. Symbols and directions repeat across signals, so
+    # intern them: every Signal for a pair shares one string and comparisons
+    # between them short-circuit on identity
+    return Signal(
+        symbol=sys.intern(symbol),
+        direction=sys.intern(direction),
+        entry=entry,
+        targets=tuple(targets),
+        stop=stop,
+        entry_numeric=entry_numeric,
+        stop_percentage=stop_percentage,
+        original_text_hash=signal_text_hash(text)
+    )
+
+def _parse_stop(stop_str: str) -> Optional[float]:
+    """Parse stop loss value, handling percentages"""
+    stop_str = stop_str.strip()
     
-    def _parse_stop(self, stop_str: str) -> Optional[float]:
-        """Parse stop loss value, handling percentages"""
-        stop_str = stop_str.strip()
-        
-        # Check if it's a percentage
-        if '%' in stop_str:
-            try:
-                percentage = float(stop_str.replace('%', ''))
-                # For percentage stops, we'll need entry price to calculate actual stop
-                # For now, return the percentage as a negative number to indicate it's percentage
-                return -percentage
-            except ValueError:
-                return None
-        
-        # Check if it's a numeric value
+    # Check if it's a percentage
+    if '%' in stop_str:
         try:
-            return float(stop_str)
+            percentage = float(stop_str.replace('%', ''))
+            # For percentage stops, we'll need entry price to calculate actual stop
+            # For now, return the percentage as a negative number to indicate it's percentage
+            return -percentage
         except ValueError:
             return None
     
-    def parse_file(self, filename: str) -> List[Signal]:
-        """Parse all signals from a file"""
-        signals = []
-        
-        if not os.path.exists(filename):
-            print(f"File {filename} not found")
-            return signals
-            
+    # Check if it's a numeric value
+    try:
+        return float(stop_str)
+    except ValueError:
+        return None
+
+def _stop_price_factor(signal: Signal) -> float:
+    """Return the multiplier taking an entry price to a percentage stop's price"""
+    percentage = abs(signal.stop)
+    if signal.direction == 'LONG':
+        return 1 - percentage / 100
+    else:  # SHORT
+        return 1 + percentage / 100
+
+def parse(text: str, default_stop_percentage: float = 3.0) -> Optional[Signal]:
+    """Parse a single signal from text without creating a SignalParser"""
+    text = text.strip()
+    # Blank input, or a first line without a BASE/QUOTE symbol, can't be
+    # a signal; reject it before hashing it for the cache or running
+    # any regex
+    if '/' not in text.partition('\n')[0]:
+        return None
+    # Results are cached per text and default, so every caller in the
+    # process shares them; Signals are immutable, so the cached instance is
+    # returned as-is
+    return _parse_cached(text, default_stop_percentage)
+
+class SignalParser:
+    """Parser for trading signals from text files"""
+
+    def __init__(self, default_stop_percentage: float = 3.0):
+        self.default_stop_percentage = default_stop_percentage
+
+    def parse_signal_text(self, text: str) -> Optional[Signal]:
+        """Parse a single signal from text"""
+        return parse(text, self.default_stop_percentage)
+    
+    def parse_file(self, filename: str, workers: Optional[int] = None) -> List[Signal]:
+        """Parse all signals from a file, optionally across worker processes"""
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # Split content into individual signals (separated by double newlines)
-            signal_blocks = content.split('\n\n')
-            
-            for block in signal_blocks:
-                if block.strip():
-                    signal = self.parse_signal_text(block)
-                    if signal:
-                        signals.append(signal)
-                    else:
-                        print(f"Failed to parse signal block:\n{block}\n")
-                        
+            # Open directly rather than checking os.path.exists first: one
+            # syscall fewer and no race between the check and the open
+            blocks = _read_blocks(filename)
+        except FileNotFoundError:
+            print(f"File {filename} not found")
+            return []
         except Exception as e:
             print(f"Error reading file {filename}: {e}")
-            
+            return []
+        return self._parse_blocks(blocks, workers)
+    
+    def parse_stream(self, fp: TextIO, workers: Optional[int] = None) -> List[Signal]:
+        """Parse all signals from an open text stream, e.g. io.StringIO"""
+        return self._parse_blocks(_split_blocks(fp.read()), workers)
+    
+    def _parse_blocks(self, signal_blocks: List[str],
+                      workers: Optional[int] = None) -> List[Signal]:
+        """Parse the blocks of a file or stream, reporting those that fail"""
+        signals = []
+        
+        # Blocks are independent, so large files can be parsed in parallel,
+        # but only when the caller asks for it: starting processes inside a
+        # library call re-imports an unguarded __main__ on spawn platforms
+        parsed = None
+        if workers and workers > 1 and len(signal_blocks) >= PARALLEL_BLOCK_THRESHOLD:
+            parsed = self._parse_in_pool(signal_blocks, workers)
+        if parsed is None:
+            parsed = map(self.parse_signal_text, signal_blocks)
+        
+        for block, signal in zip(signal_blocks, parsed):
+            if signal:
+                signals.append(signal)
+            else:
+                print(f"Failed to parse signal block:\n{block}\n")
+        
         return signals
     
+    def _parse_in_pool(self, signal_blocks: List[str],
+                       workers: int) -> Optional[List[Optional[Signal]]]:
+        """Parse blocks across worker processes, or return None if the pool fails"""
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.default_stop_percentage,)) as executor:
+                return list(executor.map(_parse_block, signal_blocks,
+                                         chunksize=_PARALLEL_CHUNKSIZE))
+        except (OSError, BrokenProcessPool) as e:
+            # The pool couldn't start (e.g. no /dev/shm for its locks) or lost
+            # a worker; the caller parses serially rather than losing the file
+            print(f"Parallel parsing failed ({e!r}), parsing serially")
+            return None
+    
+    def get_original_text(self, signal: Signal, filename: str) -> Optional[str]:
+        """Re-read the block a signal was parsed from, or None if it is gone"""
+        try:
+            blocks = _read_blocks(filename)
+        except (OSError, UnicodeDecodeError):
+            return None
+        for block in blocks:
+            if signal_text_hash(block) == signal.original_text_hash:
+                return block
+        return None
+    
     def calculate_stop_price(self, signal: Signal, entry_price: float) -> float:
         """Calculate actual stop price from percentage or absolute value"""
         if signal.stop < 0:  # Percentage stop
-            percentage = abs(signal.stop)
-            if signal.direction == 'LONG':
-                return entry_price * (1 - percentage / 100)
-            else:  # SHORT
-                return entry_price * (1 + percentage / 100)
+            return entry_price * _stop_price_factor(signal)
         else:  # Absolute stop
             return signal.stop
     
+    def calculate_stop_prices(self, signal: Signal, entry_prices: Iterable[float]) -> List[float]:
+        """Calculate the stop price for each of several entry prices"""
+        if signal.stop < 0:  # Percentage stop
+            # Work out the price multiplier once for the whole batch
+            factor = _stop_price_factor(signal)
+            return [entry_price * factor for entry_price in entry_prices]
+        else:  # Absolute stop
+            return [signal.stop for _ in entry_prices]
+    
     def validate_signal(self, signal: Signal, entry_price: float = 1000.0) -> Dict[str, any]:
         """Validate a signal and return validation results"""
         result = {
@@ -175,11 +332,11 @@ class SignalParser:
             'calculated_stop': None
         }
         
-        # Check if entry is valid
-        if signal.entry.lower() not in ['market', 'now']:
-            if signal.entry_numeric is None:
-                result['valid'] = False
-                result['errors'].append("Invalid entry price")
+        # Check if entry is valid; a numeric entry was already parsed, so the
+        # string only needs re-checking when there is no numeric value
+        if signal.entry_numeric is None and signal.entry.lower() not in _NON_NUMERIC_ENTRIES:
+            result['valid'] = False
+            result['errors'].append("Invalid entry price")
         
         # Check targets vs entry
         if signal.entry_numeric:
@@ -233,9 +390,9 @@ class SignalParser:
         results['newsignal_txt'] = signals2
         results['total_signals'] += len(signals2)
         
-        # Validate all signals
-        all_signals = signals1 + signals2
-        for signal in all_signals:
+        # Validate all signals; chain the two lists rather than building a
+        # concatenated copy that is only iterated once
+        for signal in chain(signals1, signals2):
             validation = self.validate_signal(signal, test_price)
             results['validation_results'].append({
                 'signal': signal,
@@ -249,6 +406,19 @@ class SignalParser:
         
         return results
 
+# Parser used by the worker processes of parse_file and parse_stream; set up
+# once per worker so tasks only carry the block text
+_worker_parser: Optional[SignalParser] = None
+
+def _init_worker(default_stop_percentage: float) -> None:
+    """Create the parser for a parsing worker process"""
+    global _worker_parser
+    _worker_parser = SignalParser(default_stop_percentage=default_stop_percentage)
+
+def _parse_block(block: str) -> Optional[Signal]:
+    """Parse one block inside a parsing worker process"""
+    return _worker_parser.parse_signal_text(block)
+
 def main():
     """Main function to test the parser"""
     parser = SignalParser(default_stop_percentage=3.0)
@@ -5,217 +5,306 @@ Edge Case Testing for Signal Parser
 Tests various signal formats and edge cases to ensure robustness
 """
 
-from signal_parser import SignalParser, Signal
-
-def test_edge_cases():
-    """Test various edge cases and signal formats"""
-    parser = SignalParser(default_stop_percentage=3.0)
-    
-    print("=== Testing Edge Cases ===\n")
-    
-    # Test case 1: Signal with missing fields
-    print("Test 1: Signal with missing fields")
-    incomplete_signal = """
-BTC/USDT LONG
+import io
+import math
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+import signal_parser
+from signal_parser import SignalParser, Signal, parse
+from testing_utils import run_tests
+
+PARSER = SignalParser(default_stop_percentage=3.0)
+
+# Malformed signals the parser must reject, built once at import:
+# (signal text, what is being rejected)
+REJECTED_SIGNALS = [
+    ("""
+BTCUSDT LONG
 Entry: 45000
 Target: 48000
-"""
-    result = parser.parse_signal_text(incomplete_signal)
-    if result is None:
-        print("✅ Correctly rejected incomplete signal")
-    else:
-        print("❌ Should have rejected incomplete signal")
-    print()
-    
-    # Test case 2: Signal with invalid symbol format
-    print("Test 2: Invalid symbol format")
-    invalid_symbol = """
-BTCUSDT LONG
+Stop: 44000
+""", "invalid symbol format"),
+    ("""
+BTC/ USDT LONG
 Entry: 45000
 Target: 48000
 Stop: 44000
-"""
-    result = parser.parse_signal_text(invalid_symbol)
-    if result is None:
-        print("✅ Correctly rejected invalid symbol format")
-    else:
-        print("❌ Should have rejected invalid symbol format")
-    print()
-    
-    # Test case 3: Signal with invalid direction
-    print("Test 3: Invalid direction")
-    invalid_direction = """
+""", "symbol split by a space"),
+    ("""
 BTC/USDT BUY
 Entry: 45000
 Target: 48000
 Stop: 44000
-"""
-    result = parser.parse_signal_text(invalid_direction)
-    if result is None:
-        print("✅ Correctly rejected invalid direction")
-    else:
-        print("❌ Should have rejected invalid direction")
-    print()
-    
-    # Test case 4: Signal with non-numeric target
-    print("Test 4: Non-numeric target")
-    invalid_target = """
+""", "invalid direction"),
+    ("""
 BTC/USDT LONG
 Entry: 45000
 Target: high
 Stop: 44000
-"""
-    result = parser.parse_signal_text(invalid_target)
-    if result is None:
-        print("✅ Correctly rejected non-numeric target")
-    else:
-        print("❌ Should have rejected non-numeric target")
-    print()
-    
-    # Test case 5: Signal with invalid stop format
-    print("Test 5: Invalid stop format")
-    invalid_stop = """
+""", "non-numeric target"),
+    ("""
 BTC/USDT LONG
 Entry: 45000
 Target: 48000
 Stop: invalid
-"""
-    result = parser.parse_signal_text(invalid_stop)
-    if result is None:
-        print("✅ Correctly rejected invalid stop format")
-    else:
-        print("❌ Should have rejected invalid stop format")
-    print()
-    
-    # Test case 6: Signal with very high percentage stop
-    print("Test 6: Very high percentage stop")
-    high_percentage = """
+""", "invalid stop format"),
+]
+
+def test_missing_stop():
+    """Signal without a stop falls back to the default percentage"""
+    result = parse("""
+BTC/USDT LONG
+Entry: 45000
+Target: 48000
+""")
+    assert result is not None
+    assert result.stop == -3.0
+    assert result.stop_percentage == 3.0
+
+def test_rejected_signals():
+    """Malformed signals are rejected"""
+    for signal_text, description in REJECTED_SIGNALS:
+        assert parse(signal_text) is None, f"accepted {description}"
+
+def test_multi_segment_symbol():
+    """Symbols with more than two segments are accepted"""
+    result = parse("""
+BTC/USDT/PERP LONG
+Entry: 45000
+Target: 48000
+Stop: 44000
+""")
+    assert result is not None
+    assert result.symbol == "BTC/USDT/PERP"
+
+def test_high_percentage_stop():
+    """Very high percentage stop"""
+    result = parse("""
 BTC/USDT LONG
 Entry: 45000
 Target: 48000
 Stop: 50%
-"""
-    result = parser.parse_signal_text(high_percentage)
-    if result is not None:
-        print("✅ Successfully parsed high percentage stop")
-        print(f"   Stop percentage: {result.stop_percentage}%")
-    else:
-        print("❌ Failed to parse high percentage stop")
-    print()
-    
-    # Test case 7: Signal with decimal percentage stop
-    print("Test 7: Decimal percentage stop")
-    decimal_percentage = """
+""")
+    assert result is not None
+    assert result.stop_percentage == 50.0
+
+def test_decimal_percentage_stop():
+    """Decimal percentage stop"""
+    result = parse("""
 BTC/USDT LONG
 Entry: 45000
 Target: 48000
 Stop: 2.75%
-"""
-    result = parser.parse_signal_text(decimal_percentage)
-    if result is not None:
-        print("✅ Successfully parsed decimal percentage stop")
-        print(f"   Stop percentage: {result.stop_percentage}%")
-    else:
-        print("❌ Failed to parse decimal percentage stop")
-    print()
-    
-    # Test case 8: Signal with very small numbers
-    print("Test 8: Very small numbers")
-    small_numbers = """
+""")
+    assert result is not None
+    assert result.stop_percentage == 2.75
+
+def test_very_small_numbers():
+    """Very small numbers"""
+    result = parse("""
 SHIB/USDT LONG
 Entry: 0.00001234
 Target: 0.00001500
 Stop: 0.00001000
-"""
-    result = parser.parse_signal_text(small_numbers)
-    if result is not None:
-        print("✅ Successfully parsed very small numbers")
-        print(f"   Entry: {result.entry}")
-        print(f"   Target: {result.target}")
-        print(f"   Stop: {result.stop}")
-    else:
-        print("❌ Failed to parse very small numbers")
-    print()
-    
-    # Test case 9: Signal with very large numbers
-    print("Test 9: Very large numbers")
-    large_numbers = """
+""")
+    assert result is not None
+    assert result.entry_numeric == 0.00001234
+    assert result.targets == (0.000015,)
+    assert result.stop == 0.00001
+
+def test_very_large_numbers():
+    """Very large numbers"""
+    result = parse("""
 BTC/USDT LONG
 Entry: 100000.50
 Target: 120000.00
 Stop: 95000.00
-"""
-    result = parser.parse_signal_text(large_numbers)
-    if result is not None:
-        print("✅ Successfully parsed very large numbers")
-        print(f"   Entry: {result.entry}")
-        print(f"   Target: {result.target}")
-        print(f"   Stop: {result.stop}")
-    else:
-        print("❌ Failed to parse very large numbers")
-    print()
-    
-    # Test case 10: Signal with mixed entry types
-    print("Test 10: Mixed entry types")
-    mixed_entries = [
-        """
+""")
+    assert result is not None
+    assert result.entry_numeric == 100000.5
+    assert result.targets == (120000.0,)
+    assert result.stop == 95000.0
+
+def test_mixed_entry_types():
+    """Mixed entry types"""
+    market, now, numeric = (parse(text) for text in ("""
 BTC/USDT LONG
 Entry: market
 Target: 48000
 Stop: 3%
-""",
-        """
+""", """
 ETH/USDT SHORT
 Entry: now
 Target: 3000
 Stop: 2.5%
-""",
-        """
+""", """
 ADA/USDT LONG
 Entry: 0.50
 Target: 0.55
 Stop: 0.45
-"""
-    ]
-    
-    for i, signal_text in enumerate(mixed_entries, 1):
-        result = parser.parse_signal_text(signal_text)
-        if result is not None:
-            print(f"✅ Signal {i}: Successfully parsed {result.entry} entry")
-        else:
-            print(f"❌ Signal {i}: Failed to parse")
-    print()
-    
-    # Test case 11: Validation with different test prices
-    print("Test 11: Validation with different test prices")
-    test_signal = """
+"""))
+    assert market.entry == "market" and market.entry_numeric is None
+    assert now.entry == "now" and now.entry_numeric is None
+    assert numeric.entry_numeric == 0.5
+
+def test_validation_with_different_prices():
+    """Validation with different test prices"""
+    result = parse("""
 BTC/USDT LONG
 Entry: 45000
 Target: 48000
 Stop: 3%
-"""
-    result = parser.parse_signal_text(test_signal)
-    if result is not None:
-        test_prices = [1000, 45000, 100000]
-        for price in test_prices:
-            validation = parser.validate_signal(result, price)
-            calculated_stop = validation.get('calculated_stop')
-            if calculated_stop:
-                print(f"   Test price {price}: Calculated stop = {calculated_stop:.2f}")
-    print()
-    
-    # Test case 12: Empty and whitespace-only signals
-    print("Test 12: Empty and whitespace signals")
-    empty_signals = ["", "   ", "\n\n\n", "  \n  \n  "]
-    for i, signal_text in enumerate(empty_signals, 1):
-        result = parser.parse_signal_text(signal_text)
-        if result is None:
-            print(f"✅ Empty signal {i}: Correctly rejected")
-        else:
-            print(f"❌ Empty signal {i}: Should have been rejected")
-    print()
-    
-    print("=== Edge Case Testing Complete ===")
+""")
+    assert result is not None
+    for price in [1000, 45000, 100000]:
+        validation = PARSER.validate_signal(result, price)
+        assert math.isclose(validation['calculated_stop'], price * 0.97)
+
+def test_field_keyword_prefixes():
+    """Field keywords are matched as line prefixes"""
+    result = parse("""
+BTC/USDT LONG
+EntryPrice: 5.128
+Targeted: 6
+Stops: 1
+""")
+    assert result is not None
+    assert result.entry_numeric == 5.128
+    assert result.targets == (6.0,)
+    assert result.stop == 1.0
+
+def test_hand_built_signal_stop_prices():
+    """Stop prices work for a Signal built without stop_percentage"""
+    signal = Signal(symbol="BTC/USDT", direction="SHORT", entry="market",
+                    targets=(40000.0,), stop=-3.0)
+    assert math.isclose(PARSER.calculate_stop_price(signal, 1000.0), 1030.0)
+    assert PARSER.calculate_stop_prices(signal, [1000.0]) == [PARSER.calculate_stop_price(signal, 1000.0)]
+    assert math.isclose(PARSER.validate_signal(signal, 1000.0)['calculated_stop'], 1030.0)
+
+def test_empty_signals():
+    """Empty and whitespace signals are rejected"""
+    for signal_text in ["", "   ", "\n\n\n", "  \n  \n  "]:
+        assert parse(signal_text) is None
+
+def write_temp_file(data):
+    """Write bytes to a temporary .txt file and return its path"""
+    with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as f:
+        f.write(data)
+    return f.name
+
+def parse_file_quietly(filename, workers=None):
+    """Parse a file, returning its signals and the parser's printed output"""
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        signals = PARSER.parse_file(filename, workers=workers)
+    return signals, buf.getvalue()
+
+def test_parse_file_crlf():
+    """CRLF files parse the same as their text-stream form"""
+    filename = write_temp_file(
+        b"BTC/USDT LONG\r\nEntry: 45000\r\nTarget: 48000\r\nStop: 44000\r\n\r\n"
+        b"Not a signal\r\n")
+    try:
+        signals, output = parse_file_quietly(filename)
+        with open(filename, encoding="utf-8") as f, redirect_stdout(io.StringIO()):
+            streamed = PARSER.parse_stream(f)
+    finally:
+        os.remove(filename)
+    assert signals == [parse("BTC/USDT LONG\nEntry: 45000\nTarget: 48000\nStop: 44000")]
+    assert streamed == signals
+    assert "Not a signal" in output and "\r" not in output
+
+# A file mixing every block separator: a boundary marker, a gap of several
+# blank lines, CRLF line endings and a block that is not a signal
+MIXED_SEPARATOR_FILE = (
+    b"BTC/USDT LONG\r\nEntry: 45000\r\nTarget: 48000\r\nStop: 44000\r\n"
+    b"%%--SIGNAL_BOUNDARY--%%\r\n"
+    b"ETH/USDT SHORT\r\nEntry: now\r\nTarget: 3000\r\nStop: 2.5%\r\n"
+    b"\r\n\r\n\r\n\r\n"
+    b"Target reached for an earlier call\r\n"
+    b"\r\n"
+    b"SOL/USDT LONG\r\nEntry: market\r\nTarget: 150\r\n"
+)
+
+def test_parse_file_block_separators():
+    """Files split on boundary markers and blank-line gaps"""
+    filename = write_temp_file(MIXED_SEPARATOR_FILE)
+    try:
+        signals, output = parse_file_quietly(filename)
+    finally:
+        os.remove(filename)
+    assert [signal.symbol for signal in signals] == ["BTC/USDT", "ETH/USDT", "SOL/USDT"]
+    # Only the non-signal block is reported; the gap yields no empty blocks
+    assert output.count("Failed to parse signal block") == 1
+    assert "Target reached for an earlier call" in output
+
+def exit_worker(default_stop_percentage):
+    """Worker initializer that kills its process, breaking the pool"""
+    os._exit(1)
+
+def parse_file_in_pool(filename, initializer=None):
+    """Parse a file across two workers, optionally with another initializer"""
+    threshold = signal_parser.PARALLEL_BLOCK_THRESHOLD
+    init_worker = signal_parser._init_worker
+    try:
+        # Every file with workers requested now goes through the pool
+        signal_parser.PARALLEL_BLOCK_THRESHOLD = 1
+        if initializer is not None:
+            signal_parser._init_worker = initializer
+        return parse_file_quietly(filename, workers=2)
+    finally:
+        signal_parser.PARALLEL_BLOCK_THRESHOLD = threshold
+        signal_parser._init_worker = init_worker
+
+def test_parse_file_in_worker_processes():
+    """Worker-process parsing matches serial parsing"""
+    filename = write_temp_file(MIXED_SEPARATOR_FILE)
+    try:
+        serial, _ = parse_file_quietly(filename)
+        parallel, output = parse_file_in_pool(filename)
+    finally:
+        os.remove(filename)
+    assert "Parallel parsing failed" not in output
+    assert parallel == serial
+
+def test_worker_pool_failure_falls_back():
+    """A broken worker pool falls back to serial parsing"""
+    filename = write_temp_file(MIXED_SEPARATOR_FILE)
+    try:
+        serial, _ = parse_file_quietly(filename)
+        fallback, output = parse_file_in_pool(filename, initializer=exit_worker)
+    finally:
+        os.remove(filename)
+    assert "parsing serially" in output
+    assert "Error reading file" not in output
+    assert fallback == serial
+
+def test_stream_matches_single_parse():
+    """Stream parsing accepts the same blocks as parse()"""
+    block = "BTC/USDT LONG signal update\nEntry: 45000\nTarget: 48000\nStop: 44000"
+    with redirect_stdout(io.StringIO()):
+        streamed = PARSER.parse_stream(io.StringIO(block))
+    assert streamed == [parse(block)]
+
+def test_get_original_text():
+    """Parsed signals lead back to their source block"""
+    filename = write_temp_file(MIXED_SEPARATOR_FILE)
+    try:
+        signals, _ = parse_file_quietly(filename)
+        originals = [PARSER.get_original_text(signal, filename) for signal in signals]
+        # A file that no longer decodes has lost the block too
+        with open(filename, "ab") as f:
+            f.write(b"\xff")
+        undecodable = PARSER.get_original_text(signals[0], filename)
+    finally:
+        os.remove(filename)
+    assert [parse(original) for original in originals] == signals
+    assert originals[0].strip().startswith("BTC/USDT LONG")
+    assert undecodable is None
+    assert PARSER.get_original_text(signals[0], filename) is None
 
 if __name__ == "__main__":
-    test_edge_cases()
\ No newline at end of file
+    run_tests(sys.modules[__name__])
@@ -5,18 +5,71 @@ Real Trading Scenarios Test for Signal Parser
 Tests the parser with realistic trading scenarios and market conditions
 """
 
-from signal_parser import SignalParser
-import random
+import io
+import math
+import os
+import sys
+from functools import lru_cache
+from signal_parser import SignalParser, parse
+from testing_utils import run_tests
 
-def test_real_scenarios():
-    """Test parser with realistic trading scenarios"""
-    parser = SignalParser(default_stop_percentage=3.0)
-    
-    print("=== Real Trading Scenarios Test ===\n")
-    
-    # Scenario 1: Bull market signals
-    print("Scenario 1: Bull Market Signals")
-    bull_signals = [
+# Per-signal details are only written when VERBOSE is set in the environment
+VERBOSE = bool(os.environ.get('VERBOSE'))
+
+def build_batch_signals(rng):
+    """Create the mixed batch of signals used by the batch processing test"""
+    batch_signals = []
+    count = 10
+    # Draw every signal's entry and stop kind in one batched call each; None
+    # stands for the signal's own numeric price
+    entry_kinds = rng.choices(["market", "now", None], k=count)
+    stop_kinds = rng.choices(["2%", "3%", "4%", None], k=count)
+    for i in range(count):
+        direction = "LONG" if i % 2 == 0 else "SHORT"
+        entry_type = entry_kinds[i] or str(100 + i * 10)
+        target = 100 + i * 15
+        stop_type = stop_kinds[i] or str(95 + i * 5)
+        
+        # Use valid symbol format
+        symbol = f"TEST{i:02d}/USDT"
+        
+        signal_text = f"""{symbol} {direction}
+Entry: {entry_type}
+Target: {target}
+Stop: {stop_type}"""
+        batch_signals.append(signal_text)
+    return batch_signals
+
+@lru_cache(maxsize=None)
+def batch_content():
+    """Build the batch test's signals and file content on first use"""
+    # Only the batch test needs random, so it is imported here; the batch is
+    # generated once per process, with a fixed seed so every run sees the
+    # same signals
+    import random
+    batch_signals = build_batch_signals(random.Random(0))
+    # Remove trailing newlines to match the working format
+    return batch_signals, "\n\n".join(batch_signals).rstrip('\n')
+
+PARSER = SignalParser(default_stop_percentage=3.0)
+
+def parse_scenario(kind, signal_texts, direction=None):
+    """Parse a scenario's signals, asserting every one of them is accepted"""
+    signals = []
+    for i, signal_text in enumerate(signal_texts, 1):
+        signal = parse(signal_text)
+        assert signal is not None, f"{kind} signal {i} failed to parse"
+        if direction is not None:
+            assert signal.direction == direction, f"{kind} signal {i} is {signal.direction}"
+        if VERBOSE:
+            sys.stdout.write(f"   {kind} signal {i}: {signal.symbol} {signal.direction}\n"
+                             f"   Entry: {signal.entry}, Target: {signal.targets}, Stop: {signal.stop}\n")
+        signals.append(signal)
+    return signals
+
+def test_bull_market_signals():
+    """Bull market signals"""
+    parse_scenario("Bull", [
         """
 BTC/USDT LONG
 Entry: 45000
@@ -35,22 +88,11 @@ Entry: market
 Target: 0.60
 Stop: 4%
 """
-    ]
-    
-    for i, signal_text in enumerate(bull_signals, 1):
-        signal = parser.parse_signal_text(signal_text)
-        if signal:
-            print(f"✅ Bull signal {i}: {signal.symbol} {signal.direction}")
-            print(f"   Entry: {signal.entry}, Target: {signal.target}, Stop: {signal.stop}")
-            if signal.stop < 0:
-                print(f"   Stop percentage: {signal.stop_percentage}%")
-        else:
-            print(f"❌ Bull signal {i}: Failed to parse")
-    print()
-    
-    # Scenario 2: Bear market signals
-    print("Scenario 2: Bear Market Signals")
-    bear_signals = [
+    ], direction="LONG")
+
+def test_bear_market_signals():
+    """Bear market signals"""
+    parse_scenario("Bear", [
         """
 BTC/USDT SHORT
 Entry: 50000
@@ -69,22 +111,11 @@ Entry: 100
 Target: 85
 Stop: 4%
 """
-    ]
-    
-    for i, signal_text in enumerate(bear_signals, 1):
-        signal = parser.parse_signal_text(signal_text)
-        if signal:
-            print(f"✅ Bear signal {i}: {signal.symbol} {signal.direction}")
-            print(f"   Entry: {signal.entry}, Target: {signal.target}, Stop: {signal.stop}")
-            if signal.stop < 0:
-                print(f"   Stop percentage: {signal.stop_percentage}%")
-        else:
-            print(f"❌ Bear signal {i}: Failed to parse")
-    print()
-    
-    # Scenario 3: High volatility signals
-    print("Scenario 3: High Volatility Signals")
-    volatile_signals = [
+    ], direction="SHORT")
+
+def test_high_volatility_signals():
+    """High volatility signals"""
+    signals = parse_scenario("Volatile", [
         """
 DOGE/USDT LONG
 Entry: 0.08
@@ -103,22 +134,12 @@ Entry: market
 Target: 25
 Stop: 10%
 """
-    ]
-    
-    for i, signal_text in enumerate(volatile_signals, 1):
-        signal = parser.parse_signal_text(signal_text)
-        if signal:
-            print(f"✅ Volatile signal {i}: {signal.symbol} {signal.direction}")
-            print(f"   Entry: {signal.entry}, Target: {signal.target}, Stop: {signal.stop}")
-            if signal.stop < 0:
-                print(f"   Stop percentage: {signal.stop_percentage}%")
-        else:
-            print(f"❌ Volatile signal {i}: Failed to parse")
-    print()
-    
-    # Scenario 4: Conservative signals
-    print("Scenario 4: Conservative Signals")
-    conservative_signals = [
+    ])
+    assert [signal.stop_percentage for signal in signals] == [6.0, 8.0, 10.0]
+
+def test_conservative_signals():
+    """Conservative signals"""
+    signals = parse_scenario("Conservative", [
         """
 USDT/USDT LONG
 Entry: 1.00
@@ -137,100 +158,43 @@ Entry: market
 Target: 1.01
 Stop: 1.5%
 """
-    ]
-    
-    for i, signal_text in enumerate(conservative_signals, 1):
-        signal = parser.parse_signal_text(signal_text)
-        if signal:
-            print(f"✅ Conservative signal {i}: {signal.symbol} {signal.direction}")
-            print(f"   Entry: {signal.entry}, Target: {signal.target}, Stop: {signal.stop}")
-            if signal.stop < 0:
-                print(f"   Stop percentage: {signal.stop_percentage}%")
-        else:
-            print(f"❌ Conservative signal {i}: Failed to parse")
-    print()
-    
-    # Scenario 5: Test with realistic market prices
-    print("Scenario 5: Realistic Market Price Calculations")
-    test_signal = """
+    ])
+    assert [signal.stop_percentage for signal in signals] == [1.0, 0.5, 1.5]
+
+def test_realistic_market_prices():
+    """Realistic market price calculations"""
+    signal = parse("""
 BTC/USDT LONG
 Entry: 45000
 Target: 50000
 Stop: 3%
-"""
-    
-    signal = parser.parse_signal_text(test_signal)
-    if signal:
-        print(f"✅ Test signal: {signal.symbol} {signal.direction}")
-        
-        # Test with different entry prices (simulating market conditions)
-        test_prices = [44000, 45000, 46000, 47000]
-        for price in test_prices:
-            validation = parser.validate_signal(signal, price)
-            calculated_stop = validation.get('calculated_stop')
-            if calculated_stop:
-                risk_amount = abs(price - calculated_stop)
-                risk_percentage = (risk_amount / price) * 100
-                print(f"   Entry at {price}: Stop at {calculated_stop:.2f}, Risk: {risk_percentage:.2f}%")
-    print()
-    
-    # Scenario 6: Batch processing test
-    print("Scenario 6: Batch Processing Test")
-    
-    # Create a batch of mixed signals
-    batch_signals = []
-    for i in range(10):
-        direction = "LONG" if i % 2 == 0 else "SHORT"
-        entry_type = random.choice(["market", "now", str(100 + i * 10)])
-        target = 100 + i * 15
-        stop_type = random.choice(["2%", "3%", "4%", str(95 + i * 5)])
-        
-        # Use valid symbol format
-        symbol = f"TEST{i:02d}/USDT"
-        
-        signal_text = f"""{symbol} {direction}
-Entry: {entry_type}
-Target: {target}
-Stop: {stop_type}"""
-        batch_signals.append(signal_text)
-    
-    print(f"Created {len(batch_signals)} test signals")
-    
-    # Create a temporary batch file
-    batch_content = "\n\n".join(batch_signals)
-    # Remove trailing newlines to match the working format
-    batch_content = batch_content.rstrip('\n')
-    with open("temp_batch_signals.txt", "w") as f:
-        f.write(batch_content)
+""")
+    assert signal is not None
+    
+    # Test with different entry prices (simulating market conditions)
+    test_prices = [44000, 45000, 46000, 47000]
+    calculated_stops = PARSER.calculate_stop_prices(signal, test_prices)
+    for price, calculated_stop in zip(test_prices, calculated_stops):
+        risk_percentage = abs(price - calculated_stop) / price * 100
+        assert math.isclose(risk_percentage, 3.0)
+
+def test_batch_processing():
+    """Batch processing"""
+    batch_signals, content = batch_content()
     
     # Debug: show the content
-    print("Generated batch file content:")
-    print("=" * 50)
-    print(batch_content)
-    print("=" * 50)
+    if VERBOSE:
+        print("Generated batch file content:")
+        print("=" * 50)
+        print(content)
+        print("=" * 50)
     
-    # Parse the batch file
-    parsed_signals = parser.parse_file("temp_batch_signals.txt")
+    # Parse the batch in memory; it never needs to touch the disk
+    parsed_signals = PARSER.parse_stream(io.StringIO(content))
+    assert len(parsed_signals) == len(batch_signals)
     
-    print(f"Successfully parsed {len(parsed_signals)} out of {len(batch_signals)} signals")
-    
-    # Validate all parsed signals
-    valid_count = 0
     for signal in parsed_signals:
-        validation = parser.validate_signal(signal, 1000.0)
-        if validation['valid']:
-            valid_count += 1
-    
-    print(f"Validation: {valid_count} valid out of {len(parsed_signals)} parsed signals")
-    
-    # Clean up temporary file
-    import os
-    if os.path.exists("temp_batch_signals.txt"):
-        os.remove("temp_batch_signals.txt")
-    
-    print()
-    
-    print("=== Real Scenarios Test Complete ===")
+        assert PARSER.validate_signal(signal, 1000.0)['valid'], signal.symbol
 
 if __name__ == "__main__":
-    test_real_scenarios()
\ No newline at end of file
+    run_tests(sys.modules[__name__])
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared helpers for the Signal Parser test modules
+Kept apart from run_all_tests.py so test modules can use them without
+importing the aggregate runner
+"""
+
+def run_tests(module):
+    """Run a test module's test_* functions in order, stopping at the first failure"""
+    title = module.__doc__.strip().splitlines()[0]
+    print(f"=== {title} ===\n")
+    for name, test in vars(module).items():
+        if name.startswith("test_") and getattr(test, "__module__", None) == module.__name__:
+            test()
+            print(f"✅ {test.__doc__}")
+    print(f"\n=== {title}: all tests passed ===")